@@ -51,7 +51,7 @@ def prepare_vector_store(documents: list, mode: str, force_index=False, chunk_si
         vector_store = SparseVectorStore(
             persist=True,
             saved_file="data/sparse.csv",
-            metadata_file="data/sparse_metadata.json",
+            metadata_file="data/sparse_metadata.npz",
             force_index=force_index,
         )
     elif mode == "semantic":
@@ -65,7 +65,8 @@ def prepare_vector_store(documents: list, mode: str, force_index=False, chunk_si
 
     if force_index:
         nodes = prepare_data_nodes(documents=documents, chunk_size=chunk_size)
-        vector_store.add(nodes)
+        # single bulk add; flush once at the end
+        vector_store.add(nodes, flush=True)
 
     return vector_store
 
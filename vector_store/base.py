@@ -59,7 +59,7 @@ class BaseVectorStore(BaseModel):
                 except TypeError:
                     embedding = None
                     metadata = None
-                self.node_dict[node_id] = TextNode(
+                self.node_dict[str(node_id)] = TextNode(
                     id_=str(node_id), text=text, embedding=embedding, metadata=metadata
                 )
 